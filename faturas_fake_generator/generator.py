@@ -1,26 +1,81 @@
 # %%
+import os
 import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-from typing import List, Dict
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, Dict, Optional, Tuple
 from faker import Faker
-import random
 import datetime
+from functools import lru_cache
 
-def create_dataframe(size: int = 10)-> pd.DataFrame:
+try:
+    from numba import njit, prange, set_num_threads
+except ImportError:  # Numba é opcional; sem ele as estatísticas móveis usam janelas deslizantes do NumPy
+    njit = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # PyArrow é opcional; sem ele o CSV é escrito pelo pandas
+    pa = None
+
+# Gerador aleatório compartilhado, usado quando nenhum gerador é passado explicitamente às funções
+_RNG = np.random.default_rng()
+
+# Número de nomes e de sobrenomes sorteados do Faker para montar os pools de nomes. Montar os pools
+# custa cerca de 2 * _TAMANHO_POOL_NOMES chamadas ao Faker, o mesmo que gerar esse número de clientes
+# com fake.name(), então os pools só são usados a partir de 2 * _TAMANHO_POOL_NOMES clientes
+_TAMANHO_POOL_NOMES = 512
+
+
+@lru_cache(maxsize=None)
+def _pool_de_nomes(tamanho: int = _TAMANHO_POOL_NOMES) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gera, uma única vez por processo, pools de nomes e sobrenomes com o Faker (semente fixa), usados
+    para sortear os nomes dos clientes sem uma chamada ao Faker por cliente.
+
+    :param tamanho: int: Número de nomes e de sobrenomes sorteados do Faker (padrão é _TAMANHO_POOL_NOMES).
+    :return: Tuple[np.ndarray, np.ndarray]: Nomes e sobrenomes distintos.
+    """
+    fake = Faker()
+    fake.seed_instance(0)
+    nomes = np.unique([fake.first_name() for _ in range(tamanho)])
+    sobrenomes = np.unique([fake.last_name() for _ in range(tamanho)])
+    return nomes, sobrenomes
+
+
+def create_dataframe(size: int = 10, rng: Optional[np.random.Generator] = None, fast_names: bool = True)-> pd.DataFrame:
     """
     Cria um dataframe com dados fakes de acordo com o tamanho passado como argumento.
     :param size: int: Tamanho do dataframe a ser criado (padrão é 10)
+    :param rng: np.random.Generator: Gerador aleatório (padrão é o gerador compartilhado do módulo)
+    :param fast_names: bool: Se True e size for de pelo menos 2 * _TAMANHO_POOL_NOMES (1024) clientes,
+        sorteia os nomes combinando pools de nomes e sobrenomes com o rng; abaixo disso, montar os pools
+        custa mais do que chamar o Faker para cada cliente. Se False, sempre gera cada nome com uma
+        chamada ao Faker (padrão é True)
     :return: pd.DataFrame: Dataframe com dados fakes
     """
 
-    fake = Faker()
+    rng = _RNG if rng is None else rng
+
+    if fast_names and size >= 2 * _TAMANHO_POOL_NOMES:
+        # Combina nome e sobrenome sorteados dos pools, sem chamadas ao Faker por cliente
+        nomes, sobrenomes = _pool_de_nomes()
+        clientes = np.char.add(np.char.add(rng.choice(nomes, size), " "), rng.choice(sobrenomes, size))
+    else:
+        # Semeia o Faker a partir do gerador para que os nomes também sejam reprodutíveis
+        fake = Faker()
+        fake.seed_instance(int(rng.integers(2**32)))
+        clientes = [fake.name() for _ in range(size)]
 
     # Cria um dataframe com dados de 10 pessoas
     df = pd.DataFrame({
-        "cliente": [fake.name() for _ in range(size)],
-        "age": [fake.random_int(min=18, max=80, step=1) for _ in range(size)],
-        "location": [random.choice(["interior", "cidade", "rural"]) for _ in range(size)]
+        "cliente": clientes,
+        "age": rng.integers(18, 81, size, dtype=np.int32),
+        "location": pd.Categorical(rng.choice(np.array(["interior", "cidade", "rural"]), size))
     })
     return df
 
@@ -32,7 +87,8 @@ def gerar_faturas(
         valor_minimo: float = 60,
         valor_maximo: float = 500,
         sd_min: float = 2,
-        sd_max: float = 1
+        sd_max: float = 1,
+        rng: Optional[np.random.Generator] = None
 )-> pd.DataFrame:
     """Gera faturamento de clientes de forma aleatória.
     
@@ -43,55 +99,206 @@ def gerar_faturas(
     :param valor_maximo: float: Valor máximo das faturas.
     :param sd_min: float: Desvio padrão mínimo.
     :param sd_max: float: Desvio padrão máximo.
+    :param rng: np.random.Generator: Gerador aleatório (padrão é o gerador compartilhado do módulo).
 
     :return: pd.DataFrame: Tabela com as faturas geradas.
     """
-    dados_faturas = []
-
-    num_faturas_por_cliente = np.random.randint(n_faturas_min, n_faturas_max + 1, size=len(clientes))
-    medias_faturas = np.random.uniform(valor_minimo, valor_maximo, size=len(clientes))
-    desvios_padrao = np.random.uniform(sd_min, sd_max, size=len(clientes))
+    rng = _RNG if rng is None else rng
 
-    for i, cliente in enumerate(clientes):
-        
-        valores_faturas = np.random.normal(medias_faturas[i], desvios_padrao[i], num_faturas_por_cliente[i])
+    num_faturas_por_cliente = rng.integers(n_faturas_min, n_faturas_max + 1, size=len(clientes))
+    medias_faturas = rng.uniform(valor_minimo, valor_maximo, size=len(clientes))
+    desvios_padrao = rng.uniform(sd_min, sd_max, size=len(clientes))
 
-        for valor in valores_faturas:
-            dados_faturas.append([cliente, valor])
+    # Expande os parâmetros de cada cliente para o número de faturas e sorteia todos os valores de uma vez
+    valores_faturas = rng.normal(np.repeat(medias_faturas, num_faturas_por_cliente),
+                                 np.repeat(desvios_padrao, num_faturas_por_cliente)).astype(np.float32)
 
-    df_faturas = pd.DataFrame(dados_faturas, columns=['cliente', 'vl_fatura'])
+    df_faturas = pd.DataFrame({
+        'cliente': np.repeat(np.asarray(clientes), num_faturas_por_cliente),
+        'vl_fatura': valores_faturas
+    })
 
-    df_faturas['numero_fatura'] = df_faturas.groupby('cliente').cumcount() + 1
+    # Numera as faturas de cada cliente a partir de 1, usando o deslocamento do início de cada bloco
+    inicio_cliente = np.cumsum(num_faturas_por_cliente) - num_faturas_por_cliente
+    numero_fatura = np.arange(len(df_faturas)) - np.repeat(inicio_cliente, num_faturas_por_cliente) + 1
+    df_faturas['numero_fatura'] = numero_fatura.astype(np.int32)
 
     return df_faturas
 
-def marcar_faturas_pagas(df: pd.DataFrame) -> pd.DataFrame:
+def marcar_faturas_pagas(df: pd.DataFrame, rng: Optional[np.random.Generator] = None) -> pd.DataFrame:
     """
     Marca aleatoriamente as faturas como pagas (True) ou não pagas (False), garantindo que a fatura mais recente
     esteja sempre marcada como não paga (False) e as duas últimas faturas de cada cliente possam estar pagas ou não.
 
     :param df: pd.DataFrame: DataFrame com os dados das faturas dos clientes.
+    :param rng: np.random.Generator: Gerador aleatório (padrão é o gerador compartilhado do módulo).
     :return: pd.DataFrame: DataFrame com a coluna 'status_pago' adicionada, indicando se a fatura foi paga (True) ou não (False).
     """
 
-    # Inicializa a coluna 'status_pago' com True (paga)
-    df['status_pago'] = True
-    
-    # Marca a fatura mais recente de cada cliente como False (não paga)
-    df.loc[df.groupby('cliente')['numero_fatura'].idxmax(), 'status_pago'] = False
-    
-    # Para cada cliente, identifica aleatoriamente uma das duas últimas faturas (exceto a mais recente) para ser potencialmente marcada como False (não paga)
-    for cliente in df['cliente'].unique():
-        faturas_cliente = df[df['cliente'] == cliente]
-        max_numero_fatura = faturas_cliente['numero_fatura'].max()
-        
-        if max_numero_fatura > 2:  # Se existe mais de uma fatura além da mais recente
-            fatura_aleatoria = random.choice(range(max_numero_fatura - 1, max_numero_fatura))  # Seleciona entre a penúltima e a antepenúltima
-            df.loc[(df['cliente'] == cliente) & (df['numero_fatura'] == fatura_aleatoria), 'status_pago'] = False
+    rng = _RNG if rng is None else rng
+    numero_fatura = df['numero_fatura'].to_numpy()
+    ultima_fatura = df.groupby('cliente', observed=True)['numero_fatura'].transform('max').to_numpy()
+
+    # Para cada cliente, sorteia uma das duas últimas faturas (exceto a mais recente): a penúltima ou a antepenúltima
+    codigos, clientes = pd.factorize(df['cliente'])
+    fatura_aleatoria = ultima_fatura - rng.integers(1, 3, size=len(clientes))[codigos]
+
+    # Marca como não paga (False) a fatura mais recente e, se existe mais de uma fatura além dela, a fatura sorteada
+    nao_paga = (numero_fatura == ultima_fatura) | ((ultima_fatura > 2) & (numero_fatura == fatura_aleatoria))
+    df['status_pago'] = ~nao_paga
     
     return df
 
 
+def ordenar_faturas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ordena o DataFrame (no próprio objeto) por cliente e número da fatura, apenas se ele ainda não
+    estiver nessa ordem. Verificar a ordem custa uma passagem linear, bem menos que uma nova ordenação,
+    o que torna barato chamar esta função em cada etapa do pipeline.
+
+    :param df: pd.DataFrame: DataFrame com os dados das faturas dos clientes.
+    :return: pd.DataFrame: O mesmo DataFrame, ordenado por cliente e número da fatura.
+    """
+    chaves = pd.MultiIndex.from_frame(df[['cliente', 'numero_fatura']])
+    if not chaves.is_monotonic_increasing:
+        df.sort_values(by=['cliente', 'numero_fatura'], kind='mergesort', inplace=True)
+
+    return df
+
+
+if njit is not None:
+    @njit(parallel=True, nogil=True, cache=True)
+    def _media_sd_faturas_anteriores(valores, inicio_grupos, janela, media, sd):
+        """
+        Kernel Numba que percorre os clientes em paralelo e, para cada fatura e cada coluna de valores,
+        calcula a média e o desvio padrão amostral das até `janela` faturas anteriores do mesmo cliente.
+        A primeira fatura de cada cliente não possui anteriores e recebe NaN em ambas as saídas.
+
+        Os clientes são independentes: cada iteração de `prange` escreve apenas no trecho do seu
+        cliente em `media` e `sd`, sem disputa entre threads. Como o kernel libera o GIL, também pode
+        ser chamado de várias threads Python ao mesmo tempo.
+
+        :param valores: np.ndarray: Matriz (faturas x colunas) de valores, agrupada de forma contígua por cliente.
+        :param inicio_grupos: np.ndarray: Posição inicial de cada cliente, com o total de linhas ao final.
+        :param janela: int: Número de faturas anteriores consideradas.
+        :param media: np.ndarray: Matriz de saída para as médias.
+        :param sd: np.ndarray: Matriz de saída para os desvios padrão.
+        """
+        n_colunas = valores.shape[1]
+        for g in prange(len(inicio_grupos) - 1):
+            inicio = inicio_grupos[g]
+            fim = inicio_grupos[g + 1]
+            for i in range(inicio, fim):
+                primeiro = max(inicio, i - janela)
+                n = i - primeiro
+                for k in range(n_colunas):
+                    if n == 0:
+                        media[i, k] = np.nan
+                        sd[i, k] = np.nan
+                        continue
+                    soma = 0.0
+                    for j in range(primeiro, i):
+                        soma += valores[j, k]
+                    m = soma / n
+                    media[i, k] = m
+                    if n == 1:
+                        sd[i, k] = np.nan
+                        continue
+                    soma_quadrados = 0.0
+                    for j in range(primeiro, i):
+                        soma_quadrados += (valores[j, k] - m) ** 2
+                    sd[i, k] = np.sqrt(soma_quadrados / (n - 1))
+
+
+def _media_sd_janelas_numpy(valores: np.ndarray, inicio_grupos: np.ndarray, janela: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Alternativa em NumPy puro ao kernel Numba: monta, com sliding_window_view sobre os valores
+    precedidos de `janela` NaNs, uma visão (faturas x janela) com as faturas anteriores de cada linha
+    e descarta as posições que pertencem a outro cliente. A primeira fatura de cada cliente não possui
+    anteriores e recebe NaN em ambas as saídas.
+
+    :param valores: np.ndarray: Matriz (faturas x colunas) de valores, agrupada de forma contígua por cliente.
+    :param inicio_grupos: np.ndarray: Posição inicial de cada cliente, com o total de linhas ao final.
+    :param janela: int: Número de faturas anteriores consideradas.
+    :return: Tuple[np.ndarray, np.ndarray]: Matrizes de médias e de desvios padrão.
+    """
+    n_linhas = len(valores)
+
+    # Posição de cada elemento da janela e início do cliente de cada linha, para mascarar outros clientes
+    posicoes = np.arange(n_linhas)[:, None] - janela + np.arange(janela)
+    inicio_linha = np.repeat(inicio_grupos[:-1], np.diff(inicio_grupos))
+    mascara = posicoes >= inicio_linha[:, None]
+    n = mascara.sum(axis=1)
+
+    media = np.empty_like(valores)
+    sd = np.empty_like(valores)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for k in range(valores.shape[1]):
+            preenchido = np.concatenate((np.full(janela, np.nan, dtype=valores.dtype), valores[:, k]))
+            # A linha i da visão cobre as `janela` faturas imediatamente anteriores à fatura i
+            anteriores = np.where(mascara, sliding_window_view(preenchido, janela)[:n_linhas], 0.0)
+            m = anteriores.sum(axis=1) / n
+            desvios = np.where(mascara, anteriores - m[:, None], 0.0)
+            media[:, k] = m
+            sd[:, k] = np.sqrt((desvios ** 2).sum(axis=1) / (n - 1))
+    media[n == 0] = np.nan
+    sd[n < 2] = np.nan
+
+    return media, sd
+
+
+def calcular_estatisticas_moveis(
+        df: pd.DataFrame, colunas_valor: List[str], janela: int = 12
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Calcula, em uma única passagem para todas as colunas informadas, a média e o desvio padrão dos
+    valores das faturas anteriores (até o tamanho da janela) para cada fatura de cada cliente, aplicando
+    regras específicas para os primeiros registros: as duas primeiras faturas recebem como média o valor
+    da primeira fatura e desvio padrão 0.
+
+    Quando o Numba está disponível, o cálculo é feito por um kernel compilado; caso contrário, usa
+    janelas deslizantes do NumPy.
+
+    :param df: pd.DataFrame: DataFrame com os dados das faturas dos clientes.
+    :param colunas_valor: List[str]: Nomes das colunas de valores.
+    :param janela: int: Número de faturas anteriores consideradas (padrão é 12).
+    :return: Tuple[pd.DataFrame, pd.DataFrame]: Médias e desvios padrão, com uma coluna para cada
+        coluna de valores, alinhados ao índice de df.
+    """
+    codigos, _ = pd.factorize(df['cliente'])
+
+    # Agrupa as faturas de cada cliente em blocos contíguos, preservando a ordem dentro de cada cliente;
+    # no DataFrame já ordenado a ordenação estável apenas confirma a ordem existente
+    ordem = np.argsort(codigos, kind='stable')
+    codigos_ordenados = codigos[ordem]
+    inicio_grupos = np.concatenate(([0], np.flatnonzero(np.diff(codigos_ordenados)) + 1, [len(codigos)]))
+
+    # Trabalha em float32 para reduzir pela metade o volume de memória percorrido
+    valores = np.ascontiguousarray(df[colunas_valor].to_numpy(dtype=np.float32)[ordem])
+    if njit is not None:
+        media_ordenada = np.empty_like(valores)
+        sd_ordenado = np.empty_like(valores)
+        _media_sd_faturas_anteriores(valores, inicio_grupos, janela, media_ordenada, sd_ordenado)
+    else:
+        media_ordenada, sd_ordenado = _media_sd_janelas_numpy(valores, inicio_grupos, janela)
+
+    # Devolve os resultados às posições originais das linhas
+    media = np.empty_like(media_ordenada)
+    sd = np.empty_like(sd_ordenado)
+    media[ordem] = media_ordenada
+    sd[ordem] = sd_ordenado
+
+    # As duas primeiras faturas recebem o valor da primeira fatura como média e desvio padrão 0
+    faturas_seguintes = (df['numero_fatura'] > 2).to_numpy()[:, None]
+    primeira_fatura = df.groupby('cliente', observed=True)[colunas_valor].transform('first').to_numpy()
+
+    media = np.where(faturas_seguintes, media, primeira_fatura)
+    sd = np.where(faturas_seguintes, np.nan_to_num(sd), 0)
+
+    return (pd.DataFrame(media, index=df.index, columns=colunas_valor, dtype=np.float32),
+            pd.DataFrame(sd, index=df.index, columns=colunas_valor, dtype=np.float32))
+
+
 def calcular_media_vl_fatura(df: pd.DataFrame, coluna_valor: str, coluna_saida: str) -> pd.DataFrame:
     """
     Calcula a média do valor das 12 faturas anteriores para cada fatura de cada cliente,
@@ -103,21 +310,10 @@ def calcular_media_vl_fatura(df: pd.DataFrame, coluna_valor: str, coluna_saida:
     :return: pd.DataFrame: DataFrame com a coluna de saída adicionada.
     """
     # Ordena o DataFrame por cliente e número da fatura para garantir a sequência correta
-    df.sort_values(by=['cliente', 'numero_fatura'], inplace=True)
-
-    # Inicializa a coluna de saída com NaN
-    df[coluna_saida] = np.nan
-
-    for cliente in df['cliente'].unique():
-        cliente_indices = df[df['cliente'] == cliente].index
-        for i in cliente_indices:
-            numero_fatura = df.at[i, 'numero_fatura']
-            if numero_fatura == 1 or numero_fatura == 2:
-                df.at[i, coluna_saida] = df.at[cliente_indices[0], coluna_valor]
-            else:
-                # Calcula a média das 12 faturas anteriores, se disponível
-                faturas_anteriores = df.loc[cliente_indices[df.loc[cliente_indices, 'numero_fatura'] < numero_fatura], coluna_valor]
-                df.at[i, coluna_saida] = faturas_anteriores.tail(12).mean()
+    ordenar_faturas(df)
+
+    media, _ = calcular_estatisticas_moveis(df, [coluna_valor])
+    df[coluna_saida] = media[coluna_valor]
 
     return df
 
@@ -133,21 +329,10 @@ def calcular_sd_vl_fatura(df: pd.DataFrame, coluna_valor: str, coluna_saida: str
     :return: pd.DataFrame: DataFrame com a coluna de saída adicionada.
     """
     # Ordena o DataFrame por cliente e número da fatura para garantir a sequência correta
-    df.sort_values(by=['cliente', 'numero_fatura'], inplace=True)
-
-    # Inicializa a coluna de saída com 0
-    df[coluna_saida] = np.nan
-
-    for cliente in df['cliente'].unique():
-        cliente_indices = df[df['cliente'] == cliente].index
-        for i in cliente_indices:
-            numero_fatura = df.at[i, 'numero_fatura']
-            if numero_fatura == 1 or numero_fatura == 2:
-                df.at[i, coluna_saida] = 0
-            else:
-                # Calcula o desvio padrão das 12 faturas anteriores, se disponível
-                faturas_anteriores = df.loc[cliente_indices[df.loc[cliente_indices, 'numero_fatura'] < numero_fatura], coluna_valor]
-                df.at[i, coluna_saida] = faturas_anteriores.tail(12).std()
+    ordenar_faturas(df)
+
+    _, sd = calcular_estatisticas_moveis(df, [coluna_valor])
+    df[coluna_saida] = sd[coluna_valor]
 
     return df
 
@@ -170,22 +355,49 @@ def calcular_zscore_faturas(df: pd.DataFrame, coluna_valor: str, coluna_media: s
     
     return df
 
-def marcar_pagamento_antes_vencimento(df: pd.DataFrame) -> pd.DataFrame:
+def adicionar_estatisticas_moveis(
+        df: pd.DataFrame, colunas: Dict[str, Tuple[str, str, str]], janela: int = 12
+) -> pd.DataFrame:
+    """
+    Calcula a média, o desvio padrão e o z-score das faturas anteriores para várias colunas de valores
+    de uma só vez, com uma única preparação dos grupos de clientes e uma única passagem sobre eles.
+
+    :param df: pd.DataFrame: DataFrame com os dados das faturas dos clientes.
+    :param colunas: Dict[str, Tuple[str, str, str]]: Para cada coluna de valores, os nomes das colunas de
+        saída da média, do desvio padrão e do z-score.
+    :param janela: int: Número de faturas anteriores consideradas (padrão é 12).
+    :return: pd.DataFrame: DataFrame com as colunas de saída adicionadas.
+    """
+    # Ordena o DataFrame por cliente e número da fatura para garantir a sequência correta
+    ordenar_faturas(df)
+
+    media, sd = calcular_estatisticas_moveis(df, list(colunas), janela)
+    for coluna_valor, (coluna_media, coluna_sd, coluna_zscore) in colunas.items():
+        df[coluna_media] = media[coluna_valor]
+        df[coluna_sd] = sd[coluna_valor]
+        calcular_zscore_faturas(df, coluna_valor, coluna_media, coluna_sd, coluna_zscore)
+
+    return df
+
+def marcar_pagamento_antes_vencimento(df: pd.DataFrame, rng: Optional[np.random.Generator] = None) -> pd.DataFrame:
     """
     Adiciona uma coluna booleana ao DataFrame indicando se a fatura foi paga antes do vencimento.
     Para faturas onde 'status_pago' é False, o valor da nova coluna também será False.
     Para as demais faturas, o valor será determinado aleatoriamente.
 
     :param df: pd.DataFrame: DataFrame com os dados das faturas dos clientes, incluindo a coluna 'status_pago'.
+    :param rng: np.random.Generator: Gerador aleatório (padrão é o gerador compartilhado do módulo).
     :return: pd.DataFrame: DataFrame com a coluna 'pago_antes_vencimento' adicionada.
     """
     
     # Gera valores aleatórios para 'pago_antes_vencimento', exceto onde 'status_pago' é False
-    df['pago_antes_vencimento'] = df['status_pago'].apply(lambda x: random.choice([True, False]) if x else False)
+    rng = _RNG if rng is None else rng
+    sorteio = rng.random(len(df)) < 0.5
+    df['pago_antes_vencimento'] = sorteio & df['status_pago'].to_numpy(dtype=bool)
     
     return df
 
-def calcular_dias_pagamento(df: pd.DataFrame, dias_min_atraso: int = 1, dias_max_atraso: int = 100, dias_min_antecipado: int = -5, dias_max_antecipado: int = 0) -> pd.DataFrame:
+def calcular_dias_pagamento(df: pd.DataFrame, dias_min_atraso: int = 1, dias_max_atraso: int = 100, dias_min_antecipado: int = -5, dias_max_antecipado: int = 0, rng: Optional[np.random.Generator] = None) -> pd.DataFrame:
     """
     Adiciona uma coluna ao DataFrame com o número inteiro de dias de atraso ou antecipação para faturas.
     Para faturas não pagas antes do vencimento, os dias de atraso são gerados aleatoriamente dentro de um
@@ -196,18 +408,24 @@ def calcular_dias_pagamento(df: pd.DataFrame, dias_min_atraso: int = 1, dias_max
     :param dias_max_atraso: int: Valor máximo de dias de atraso (padrão é 100).
     :param dias_min_antecipado: int: Valor mínimo de dias de antecipação (padrão é -5).
     :param dias_max_antecipado: int: Valor máximo de dias de antecipação (padrão é 0).
+    :param rng: np.random.Generator: Gerador aleatório (padrão é o gerador compartilhado do módulo).
     :return: pd.DataFrame: DataFrame com a coluna 'dias_pagamento' adicionada.
     """
     
-    # Define a função para calcular os dias de pagamento baseado no status de pagamento
-    def calcular_dias(x):
-        if x['pago_antes_vencimento']:
-            return random.randint(dias_min_antecipado, dias_max_antecipado)
-        else:
-            return random.randint(dias_min_atraso, dias_max_atraso)
-
-    # Aplica a função acima para cada linha do DataFrame e cria a coluna 'dias_pagamento'
-    df['dias_pagamento'] = df.apply(calcular_dias, axis=1)
+    # Sorteia de uma só vez os dias de antecipação e de atraso para todas as faturas
+    n = len(df)
+    rng = _RNG if rng is None else rng
+    dias_antecipado = rng.integers(dias_min_antecipado, dias_max_antecipado + 1, n)
+    dias_atraso = rng.integers(dias_min_atraso, dias_max_atraso + 1, n)
+
+    # Seleciona antecipação ou atraso conforme o status de pagamento e cria a coluna 'dias_pagamento'
+    # Usa o menor tipo inteiro (no mínimo int16) que comporta todos os limites informados; limites que
+    # misturam negativos e valores acima de int64 promoveriam para float, então ficam no int64 do sorteio
+    tipo = np.result_type(*(np.min_scalar_type(limite) for limite in
+                            (dias_min_atraso, dias_max_atraso, dias_min_antecipado, dias_max_antecipado)), np.int16)
+    if not np.issubdtype(tipo, np.integer):
+        tipo = np.int64
+    df['dias_pagamento'] = np.where(df['pago_antes_vencimento'].to_numpy(), dias_antecipado, dias_atraso).astype(tipo)
     
     return df
 
@@ -222,22 +440,21 @@ def calcular_frequencia_faturas_aberto_12_meses(
     :param coluna_saida: str: Nome da coluna de saída para a frequência de faturas em aberto nos 12 meses anteriores.
     :return: pd.DataFrame: DataFrame com a coluna de saída adicionada.
     """
-    # Inicializa a coluna de saída com 0
-    df[coluna_saida] = 0
-
     # Ordena o DataFrame por cliente e número da fatura para garantir a sequência correta
-    df.sort_values(by=['cliente', 'numero_fatura'], inplace=True)
-
-    for cliente in df['cliente'].unique():
-        faturas_cliente = df[df['cliente'] == cliente]
-        for idx, fatura in faturas_cliente.iterrows():
-            # Identifica o intervalo de 12 meses anteriores para a fatura atual
-            limite_superior = fatura['numero_fatura'] - 1
-            limite_inferior = max(1, limite_superior - 12)
-            # Seleciona as faturas dentro desse intervalo
-            faturas_anteriores = faturas_cliente[(faturas_cliente['numero_fatura'] <= limite_superior) & (faturas_cliente['numero_fatura'] > limite_inferior)]
-            # Calcula a quantidade de faturas em aberto nesse intervalo
-            df.at[idx, coluna_saida] = sum(faturas_anteriores[coluna_status].apply(lambda x: 1 if not x else 0))
+    ordenar_faturas(df)
+
+    # Marca as faturas em aberto; a primeira fatura do cliente fica fora da janela dos 12 meses anteriores
+    em_aberto = (~df[coluna_status].astype(bool)).astype(np.int8)
+    em_aberto = em_aberto.where(df['numero_fatura'] > 1, 0)
+
+    # Soma móvel das até 12 faturas anteriores, deslocada uma posição dentro do cliente
+    anteriores = em_aberto.groupby(df['cliente'], observed=True).shift(1).fillna(0)
+    df[coluna_saida] = (anteriores
+                        .groupby(df['cliente'], observed=True)
+                        .rolling(12, min_periods=1)
+                        .sum()
+                        .reset_index(level=0, drop=True)
+                        .astype(np.int32))
 
     return df
 
@@ -253,31 +470,25 @@ def calcular_total_devido(df: pd.DataFrame, coluna_status_pago: str, coluna_pago
     :param coluna_saida: str: Nome da coluna de saída para o total devido.
     :return: pd.DataFrame: DataFrame com a coluna de saída adicionada.
     """
-    # Inicializa a coluna de saída com 0
-    df[coluna_saida] = 0.0
-
     # Ordena o DataFrame por cliente e número da fatura para garantir a sequência correta
-    df.sort_values(by=['cliente', 'numero_fatura'], inplace=True)
-
-    for cliente in df['cliente'].unique():
-        faturas_cliente = df[df['cliente'] == cliente]
-        for idx, fatura_atual in faturas_cliente.iterrows():
-            numero_fatura_atual = fatura_atual['numero_fatura']
-            if fatura_atual[coluna_status_pago]:
-                # Considera as faturas dos últimos 3 meses que não foram pagas antes do vencimento
-                limite_inferior = max(1, numero_fatura_atual - 3)
-                faturas_analisadas = faturas_cliente[(faturas_cliente['numero_fatura'] >= limite_inferior) & 
-                                                     (faturas_cliente['numero_fatura'] < numero_fatura_atual) &
-                                                     (faturas_cliente[coluna_pago_antes_vencimento] == False)]
-            else:
-                # Considera todas as faturas não pagas nos últimos 12 meses
-                limite_inferior = max(1, numero_fatura_atual - 12)
-                faturas_analisadas = faturas_cliente[(faturas_cliente['numero_fatura'] >= limite_inferior) & 
-                                                     (faturas_cliente['numero_fatura'] < numero_fatura_atual) & 
-                                                     (faturas_cliente[coluna_status_pago] == False)]
-            
-            total_devido = faturas_analisadas[coluna_valor].sum()
-            df.at[idx, coluna_saida] = total_devido
+    ordenar_faturas(df)
+
+    # Valores que entram em cada regra: não pagas antes do vencimento (3 meses) e não pagas (12 meses)
+    valores_3_meses = df[coluna_valor].where(~df[coluna_pago_antes_vencimento].astype(bool), 0.0)
+    valores_12_meses = df[coluna_valor].where(~df[coluna_status_pago].astype(bool), 0.0)
+
+    def soma_faturas_anteriores(valores: pd.Series, janela: int) -> pd.Series:
+        anteriores = valores.groupby(df['cliente'], observed=True).shift(1).fillna(0.0)
+        return (anteriores
+                .groupby(df['cliente'], observed=True)
+                .rolling(janela, min_periods=1)
+                .sum()
+                .reset_index(level=0, drop=True))
+
+    # Faturas pagas consideram os últimos 3 meses; as demais, os últimos 12 meses
+    total_3_meses = soma_faturas_anteriores(valores_3_meses, 3)
+    total_12_meses = soma_faturas_anteriores(valores_12_meses, 12)
+    df[coluna_saida] = total_3_meses.where(df[coluna_status_pago].astype(bool), total_12_meses).astype(np.float32)
 
     return df
 
@@ -304,7 +515,9 @@ def build_fake_dataframe(size: int,
                             coluna_total_devido: str,
                             coluna_media_total_devido: str, 
                             coluna_sd_total_devido: str, 
-                            coluna_zscore_total_devido: str) -> pd.DataFrame:
+                            coluna_zscore_total_devido: str,
+                            rng: Optional[np.random.Generator] = None,
+                            df_clientes: Optional[pd.DataFrame] = None) -> pd.DataFrame:
     """
     Gera um dataframe com dados fictícios de clientes e faturas.
 
@@ -365,40 +578,114 @@ def build_fake_dataframe(size: int,
     :param coluna_sd_total_devido: Nome da coluna de saída para os desvios padrão calculados.
     :type coluna_zscore_total_devido: str, optional
     :param coluna_zscore_total_devido: Nome da coluna de saída para os z-scores calculados.
+    :type rng: numpy.random.Generator, optional
+    :param rng: Gerador aleatório usado em todas as etapas (padrão é o gerador compartilhado do módulo).
+    :type df_clientes: pandas.core.frame.DataFrame, optional
+    :param df_clientes: Clientes já gerados por create_dataframe. Se for None, gera `size` clientes.
     
     return: DataFrame com os dados fictícios de clientes e faturas.
     :rtype: pandas.core.frame.DataFrame
     """
-    df_clientes = create_dataframe(size=size)
+    rng = _RNG if rng is None else rng
+    if df_clientes is None:
+        df_clientes = create_dataframe(size=size, rng=rng)
     df_faturas = gerar_faturas(df_clientes[coluna_cliente].unique(), n_faturas_min, n_faturas_max, 
-                               valor_minimo, valor_maximo, sd_min, sd_max)
+                               valor_minimo, valor_maximo, sd_min, sd_max, rng=rng)
     df = df_clientes.merge(df_faturas, on=coluna_cliente)
+
+    # Codifica o cliente como categoria uma única vez, para que os agrupamentos usem os códigos inteiros
+    # em vez de recalcular o hash dos nomes, e ordena as faturas de cada cliente em blocos contíguos;
+    # com o DataFrame já ordenado, as etapas seguintes não precisam ordená-lo novamente
+    df[coluna_cliente] = df[coluna_cliente].astype('category')
+    df = df.sort_values(by=[coluna_cliente, coluna_numero_fatura], kind='mergesort').reset_index(drop=True)
     df = (df
-          .pipe(marcar_faturas_pagas)
-          .pipe(calcular_media_vl_fatura, coluna_vl_fatura, coluna_media_vl_fatura)
-          .pipe(calcular_sd_vl_fatura, coluna_vl_fatura, coluna_sd_vl_fatura)
-          .pipe(calcular_zscore_faturas, coluna_vl_fatura, coluna_media_vl_fatura, coluna_sd_vl_fatura, coluna_zscore_faturas)
-          .pipe(marcar_pagamento_antes_vencimento)
-          .pipe(calcular_dias_pagamento, dias_min_atraso, dias_max_atraso, dias_min_antecipado, dias_max_antecipado)
-          .pipe(calcular_media_vl_fatura, coluna_dias_pagamento, coluna_media_dias_pagamento)
-          .pipe(calcular_sd_vl_fatura, coluna_dias_pagamento, coluna_sd_dias_pagamento)
-          .pipe(calcular_zscore_faturas, coluna_dias_pagamento, coluna_media_dias_pagamento, coluna_sd_dias_pagamento, coluna_zscore_dias_pagamento)
+          .pipe(marcar_faturas_pagas, rng=rng)
+          .pipe(marcar_pagamento_antes_vencimento, rng=rng)
+          .pipe(calcular_dias_pagamento, dias_min_atraso, dias_max_atraso, dias_min_antecipado, dias_max_antecipado, rng=rng)
           .pipe(calcular_frequencia_faturas_aberto_12_meses, coluna_pago_antes_vencimento, coluna_frequencia_faturas_aberto_12_meses)
           .pipe(calcular_total_devido, coluna_status_pago, coluna_pago_antes_vencimento, coluna_vl_fatura, coluna_total_devido)
-          .pipe(calcular_media_vl_fatura, coluna_total_devido, coluna_media_total_devido)
-          .pipe(calcular_sd_vl_fatura, coluna_total_devido, coluna_sd_total_devido)
-          .pipe(calcular_zscore_faturas, coluna_total_devido, coluna_media_total_devido, coluna_sd_total_devido, coluna_zscore_total_devido)
+          .pipe(adicionar_estatisticas_moveis, {
+              coluna_vl_fatura: (coluna_media_vl_fatura, coluna_sd_vl_fatura, coluna_zscore_faturas),
+              coluna_dias_pagamento: (coluna_media_dias_pagamento, coluna_sd_dias_pagamento, coluna_zscore_dias_pagamento),
+              coluna_total_devido: (coluna_media_total_devido, coluna_sd_total_devido, coluna_zscore_total_devido),
+          })
          )
-    return df
 
+    # Mantém cada grupo de estatísticas ao lado da etapa que gera a coluna de origem
+    return df[[*df_clientes.columns, coluna_vl_fatura, coluna_numero_fatura, coluna_status_pago,
+               coluna_media_vl_fatura, coluna_sd_vl_fatura, coluna_zscore_faturas,
+               coluna_pago_antes_vencimento, coluna_dias_pagamento,
+               coluna_media_dias_pagamento, coluna_sd_dias_pagamento, coluna_zscore_dias_pagamento,
+               coluna_frequencia_faturas_aberto_12_meses, coluna_total_devido,
+               coluna_media_total_devido, coluna_sd_total_devido, coluna_zscore_total_devido]]
 
-def generate_fake_dataframe(size: int = 100) -> pd.DataFrame:
+
+def generate_fake_dataframe(size: int = 100, rng: Optional[np.random.Generator] = None,
+                            n_processos: Optional[int] = 1) -> pd.DataFrame:
     """
     Executa a geração de um dataframe com dados fictícios de clientes e faturas utilizando os valores padrão
     e imprime o resultado no formato CSV.
+
+    Como os clientes são independentes entre si, a geração pode ser dividida em blocos de clientes
+    processados em paralelo, cada um com um gerador aleatório próprio derivado de `rng`. Iniciar os
+    processos custa alguns segundos (cada um reimporta pandas, Numba e Faker), então o paralelismo só
+    compensa para dezenas de milhares de clientes e precisa ser pedido explicitamente.
+
+    :param size: int: Número de clientes a serem gerados (padrão é 100).
+    :param rng: np.random.Generator: Gerador aleatório (padrão é o gerador compartilhado do módulo).
+    :param n_processos: int: Número de processos usados na geração (padrão é 1). Se for None, usa todos
+        os núcleos disponíveis.
+    :return: pd.DataFrame: DataFrame com os dados fictícios de clientes e faturas.
+    """
+    rng = _RNG if rng is None else rng
+    if n_processos is None:
+        n_processos = os.cpu_count() or 1
+    n_processos = max(1, min(n_processos, size))
+
+    df_clientes = create_dataframe(size=size, rng=rng)
+    if n_processos == 1:
+        return _gerar_bloco_clientes(df_clientes, rng)
+
+    # Divide os nomes distintos em blocos, para que um mesmo nome nunca fique em dois processos,
+    # e dá a cada bloco um gerador independente
+    nomes = df_clientes['cliente'].unique()
+    blocos_clientes = [df_clientes[df_clientes['cliente'].isin(bloco)]
+                       for bloco in np.array_split(nomes, n_processos)]
+    geradores = rng.spawn(n_processos)
+
+    # Usa 'spawn' para não herdar o pool de threads do Numba já inicializado no processo pai
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=n_processos, mp_context=contexto,
+                             initializer=_inicializar_processo) as executor:
+        blocos = list(executor.map(_gerar_bloco_clientes, blocos_clientes, geradores))
+
+    # Junta os blocos, restaura as colunas categóricas e mantém a ordem por cliente e número da fatura
+    df = pd.concat(blocos, ignore_index=True)
+    for coluna in blocos[0].select_dtypes('category').columns:
+        df[coluna] = df[coluna].astype('category')
+    return ordenar_faturas(df).reset_index(drop=True)
+
+
+def _inicializar_processo() -> None:
+    """
+    Limita o kernel Numba a uma thread em cada processo de generate_fake_dataframe, já que o
+    paralelismo vem dos próprios processos; sem isso seriam criadas núcleos x núcleos threads.
+    """
+    if njit is not None:
+        set_num_threads(1)
+
+
+def _gerar_bloco_clientes(df_clientes: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Gera as faturas de um bloco de clientes com os valores padrão; executado em cada processo de
+    generate_fake_dataframe.
+
+    :param df_clientes: pd.DataFrame: Clientes do bloco, gerados por create_dataframe.
+    :param rng: np.random.Generator: Gerador aleatório do bloco.
+    :return: pd.DataFrame: DataFrame com os dados fictícios dos clientes do bloco.
     """
     df = build_fake_dataframe(
-        size=size, n_faturas_min=20, n_faturas_max=60,
+        size=len(df_clientes), n_faturas_min=20, n_faturas_max=60,
         valor_minimo=60, valor_maximo=500, 
         sd_min=2, sd_max=5,
         coluna_cliente='cliente', coluna_vl_fatura='vl_fatura', 
@@ -418,26 +705,82 @@ def generate_fake_dataframe(size: int = 100) -> pd.DataFrame:
         coluna_total_devido='total_devido',
         coluna_media_total_devido='media_total_devido', 
         coluna_sd_total_devido='sd_total_devido', 
-        coluna_zscore_total_devido='zscore_total_devido'
+        coluna_zscore_total_devido='zscore_total_devido',
+        rng=rng,
+        df_clientes=df_clientes
     )
     return df
 
-def main(size: int = 100) -> None:
+def escrever_csv(df: pd.DataFrame, saida, usar_pyarrow: bool = False) -> None:
+    """
+    Escreve o DataFrame em formato CSV, sem o índice, usando o to_csv do pandas. Com usar_pyarrow=True,
+    usa o escritor em C++ do PyArrow, que serializa as colunas em lotes diretamente no buffer binário da
+    saída e é mais rápido para DataFrames grandes. Os booleanos são escritos como True/False, como no
+    pandas, mas a saída não é idêntica: o PyArrow coloca as strings (inclusive True/False) entre aspas e
+    escreve floats inteiros sem casa decimal (0 em vez de 0.0). Por isso o PyArrow é uma opção explícita
+    e não é escolhido só por estar instalado.
+
+    :param df: pd.DataFrame: DataFrame a ser escrito.
+    :param saida: Arquivo de texto de saída (por exemplo, sys.stdout).
+    :param usar_pyarrow: bool: Se True, escreve com o PyArrow (padrão é False).
+    """
+    if not usar_pyarrow:
+        df.to_csv(saida, index=False)
+        return
+
+    if pa is None:
+        raise ImportError("usar_pyarrow=True requer o pacote pyarrow instalado.")
+
+    # Converte os booleanos para texto para manter o True/False do pandas em vez do true/false do PyArrow
+    colunas_bool = df.select_dtypes(bool).columns
+    df = df.astype({coluna: str for coluna in colunas_bool})
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    opcoes = pa_csv.WriteOptions(quoting_style="needed")
+    if hasattr(saida, 'buffer'):
+        saida.flush()
+        pa_csv.write_csv(tabela, saida.buffer, opcoes)
+        saida.buffer.flush()
+    else:
+        buffer = pa.BufferOutputStream()
+        pa_csv.write_csv(tabela, buffer, opcoes)
+        saida.write(buffer.getvalue().to_pybytes().decode())
+
+
+def main(size: int = 100, usar_pyarrow: bool = False, n_processos: Optional[int] = 1) -> None:
     """
     Função principal que executa a geração de um dataframe com dados fictícios de clientes e faturas utilizando os valores padrão.
+    Com usar_pyarrow=True, o CSV é escrito pelo PyArrow (veja escrever_csv). n_processos é repassado a
+    generate_fake_dataframe; None usa todos os núcleos.
     """
-    df_resultado = generate_fake_dataframe(size)
-    df_resultado.to_csv(sys.stdout, index=False)
+    df_resultado = generate_fake_dataframe(size, n_processos=n_processos)
+    escrever_csv(df_resultado, sys.stdout, usar_pyarrow=usar_pyarrow)
 
 if __name__ == "__main__":
+    # Separa as opções (--pyarrow, --processos[=N]) do argumento posicional de tamanho.
+    opcoes = [argumento for argumento in sys.argv[1:] if argumento.startswith('--')]
+    argumentos = [argumento for argumento in sys.argv[1:] if not argumento.startswith('--')]
+    usar_pyarrow = '--pyarrow' in opcoes
+
+    # --processos sem valor usa todos os núcleos; --processos=N usa N processos.
+    n_processos = 1
+    for opcao in opcoes:
+        if opcao == '--processos':
+            n_processos = None
+        elif opcao.startswith('--processos='):
+            try:
+                n_processos = int(opcao.split('=', 1)[1])
+            except ValueError:
+                print("O número de processos fornecido não é um inteiro válido. Usando um único processo.")
+
     # Verifica se um argumento de tamanho foi fornecido na linha de comando.
-    if len(sys.argv) > 1:
+    if argumentos:
         try:
-            size = int(sys.argv[1])  # Tenta converter o segundo argumento para inteiro.
+            size = int(argumentos[0])  # Tenta converter o argumento de tamanho para inteiro.
         except ValueError:
             print("O argumento fornecido não é um inteiro válido. Usando o valor padrão de 100.")
             size = 100
     else:
         size = 100  # Usa o valor padrão se nenhum argumento for fornecido.
 
-    main(size)
+    main(size, usar_pyarrow=usar_pyarrow, n_processos=n_processos)
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import generator
+
+
+def faturas_aleatorias(seed: int = 0) -> pd.DataFrame:
+    """Faturas embaralhadas de clientes com 1 a 30 faturas, incluindo clientes com 1 e 2 faturas."""
+    rng = np.random.default_rng(seed)
+    linhas = []
+    for i, n_faturas in enumerate([1, 2, 3, *rng.integers(1, 31, size=20)]):
+        for numero in range(1, n_faturas + 1):
+            linhas.append((f"cliente_{i:02d}", numero, rng.normal(200, 50),
+                           bool(rng.random() < 0.7), bool(rng.random() < 0.4)))
+    df = pd.DataFrame(linhas, columns=['cliente', 'numero_fatura', 'vl_fatura', 'status_pago', 'pago_antes_vencimento'])
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def referencia(df: pd.DataFrame) -> pd.DataFrame:
+    """Implementação direta, fatura a fatura, das regras de cada estatística."""
+    linhas = []
+    for _, faturas in df.sort_values(['cliente', 'numero_fatura']).groupby('cliente'):
+        valores = faturas['vl_fatura'].to_numpy()
+        status = faturas['status_pago'].to_numpy()
+        antes = faturas['pago_antes_vencimento'].to_numpy()
+        for i, (indice, numero) in enumerate(zip(faturas.index, faturas['numero_fatura'])):
+            anteriores = valores[max(0, i - 12):i]
+            if numero <= 2:
+                media, sd = valores[0], 0.0
+            else:
+                media, sd = anteriores.mean(), anteriores.std(ddof=1)
+            # A primeira fatura do cliente nunca entra na contagem de faturas em aberto
+            frequencia = int(np.sum(~antes[max(1, i - 12):i]))
+            if status[i]:
+                total = valores[max(0, i - 3):i][~antes[max(0, i - 3):i]].sum()
+            else:
+                total = anteriores[~status[max(0, i - 12):i]].sum()
+            linhas.append((indice, media, sd, frequencia, total))
+    return pd.DataFrame(linhas, columns=['indice', 'media', 'sd', 'frequencia', 'total']).set_index('indice').sort_index()
+
+
+@pytest.fixture(params=['numba', 'numpy'])
+def backend(request, monkeypatch):
+    if request.param == 'numba':
+        if generator.njit is None:
+            pytest.skip("Numba não está instalado")
+    else:
+        monkeypatch.setattr(generator, 'njit', None)
+    return request.param
+
+
+def test_estatisticas_moveis_conferem_com_referencia(backend):
+    # Ordena apenas pelo número da fatura, deixando os clientes intercalados (blocos não contíguos)
+    df = faturas_aleatorias().sort_values('numero_fatura', kind='stable')
+    esperado = referencia(df)
+
+    media, sd = generator.calcular_estatisticas_moveis(df, ['vl_fatura'])
+
+    np.testing.assert_allclose(media['vl_fatura'].sort_index(), esperado['media'], rtol=1e-4, atol=1e-3)
+    np.testing.assert_allclose(sd['vl_fatura'].sort_index(), esperado['sd'], rtol=1e-4, atol=1e-3)
+
+
+def test_media_e_sd_conferem_com_referencia(backend):
+    df = faturas_aleatorias(seed=1)
+    esperado = referencia(df)
+
+    df = generator.calcular_media_vl_fatura(df, 'vl_fatura', 'media')
+    df = generator.calcular_sd_vl_fatura(df, 'vl_fatura', 'sd').sort_index()
+
+    np.testing.assert_allclose(df['media'], esperado['media'], rtol=1e-4, atol=1e-3)
+    np.testing.assert_allclose(df['sd'], esperado['sd'], rtol=1e-4, atol=1e-3)
+
+
+def test_frequencia_e_total_devido_conferem_com_referencia():
+    df = faturas_aleatorias(seed=2)
+    esperado = referencia(df)
+
+    df = generator.calcular_frequencia_faturas_aberto_12_meses(df, 'pago_antes_vencimento', 'frequencia')
+    df = generator.calcular_total_devido(df, 'status_pago', 'pago_antes_vencimento', 'vl_fatura', 'total').sort_index()
+
+    np.testing.assert_array_equal(df['frequencia'], esperado['frequencia'])
+    np.testing.assert_allclose(df['total'], esperado['total'], rtol=1e-4, atol=1e-3)